@@ -6,13 +6,201 @@ Tests conversions before applying them, and estimates run time.
 Rapid Gcode © 2025 by George Fraser is licensed under CC BY-NC 4.0. To view a copy of this license, visit https://creativecommons.org/licenses/by-nc/4.0/ 
 """
 
+import os
 import re
 import sys
+from array import array
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from math import sqrt
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, List, Tuple
 
-@dataclass
+# Precompiled patterns used by _parse_words
+_COMMENT_PAREN = re.compile(r'\(.*?\)')
+_COMMENT_SEMI = re.compile(r';.*$')
+
+# Single-pass tokenizer: comments are matched (and skipped) inline, every
+# other match is a word letter followed by its numeric value. Lines are
+# upper-cased before tokenizing, so no case-insensitive matching is needed.
+_WORD_RE = re.compile(r'\([^)]*\)|;.*|([GMXYZIJKRFS])([-+]?\d*\.?\d+)')
+
+def _int_word(value: str) -> int:
+    """Convert a G/M/S word value to an int (e.g. '01' -> 1, '8000.' -> 8000)."""
+    return int(float(value))
+
+# Value converter for each word letter matched by _WORD_RE
+_WORD_TYPES = {
+    'G': _int_word, 'M': _int_word, 'S': _int_word,
+    'X': float, 'Y': float, 'Z': float,
+    'I': float, 'J': float, 'K': float, 'R': float,
+    'F': float,
+}
+
+_DIGIT_RE = re.compile(r'\d')
+
+# Presence bit for each word letter, so "which words does this line have"
+# checks are single integer tests instead of several dict lookups
+_WORD_BITS = {
+    'G': 1 << 0, 'M': 1 << 1,
+    'X': 1 << 2, 'Y': 1 << 3, 'Z': 1 << 4,
+    'I': 1 << 5, 'J': 1 << 6, 'K': 1 << 7,
+    'F': 1 << 8, 'S': 1 << 9, 'R': 1 << 10,
+}
+_B_G = _WORD_BITS['G']
+_B_Z = _WORD_BITS['Z']
+_B_F = _WORD_BITS['F']
+_B_S = _WORD_BITS['S']
+_XYZ_BITS = _WORD_BITS['X'] | _WORD_BITS['Y'] | _B_Z
+_MOTION_BITS = _XYZ_BITS | _WORD_BITS['I'] | _WORD_BITS['J'] | _WORD_BITS['K']
+
+def _word_flags(parsed: dict) -> int:
+    """Presence bits for a parsed dict that did not come from parse_line."""
+    flags = 0
+    for letter, bit in _WORD_BITS.items():
+        if letter in parsed:
+            flags |= bit
+    return flags
+
+# Parse result for lines without any code
+_EMPTY_WORDS = ((('type', 'empty'),), (), 0)
+
+# Number of distinct stripped lines whose parse result is memoized
+_PARSE_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_words(line: str) -> Tuple[tuple, Optional[tuple], int]:
+    """Parse a stripped G-code line into immutable (key, value) pairs.
+    
+    Also returns the (start, end, replacement) edits that turn the line into
+    a rapid (every G1 word becomes G0 and every F word is dropped) and the
+    _WORD_BITS flags of the words present.
+    
+    Toolpaths repeat many lines verbatim (retracts, plunges, returns to
+    origin), so results are cached; parse_line wraps them in a fresh dict.
+    """
+    # Fast path: blank lines and whole-line comments carry no words
+    if not line or line[0] == ';' or (line[0] == '(' and line.find(')') == len(line) - 1):
+        return _EMPTY_WORDS
+    
+    # Text without comments (only rebuilt when a comment is present)
+    code = line
+    if '(' in line or ';' in line:
+        code = _COMMENT_SEMI.sub('', _COMMENT_PAREN.sub('', line)).strip()
+    
+    if not code:
+        return _EMPTY_WORDS
+    
+    # Fast path: every word needs a digit, so without one there is nothing to tokenize
+    if not _DIGIT_RE.search(code):
+        return (('type', 'command'), ('original', code)), (), 0
+    
+    result = {'type': 'command', 'original': code}
+    rapid_edits = []
+    flags = 0
+    
+    # G-code is case-insensitive; upper-case once for matching only
+    upper = line.upper()
+    
+    # Walk the words once, skipping comments (first occurrence wins)
+    for match in _WORD_RE.finditer(upper):
+        letter = match.group(1)
+        if letter is None:
+            continue
+        value = _WORD_TYPES[letter](match.group(2))
+        if letter not in result:
+            result[letter] = value
+            flags |= _WORD_BITS[letter]
+        if letter == 'F':
+            rapid_edits.append((match.start(), match.end(), ''))
+        elif letter == 'G' and value == 1:
+            rapid_edits.append((match.start(), match.end(), 'G0'))
+    
+    # Edits index into the original line, so they are only usable when
+    # upper-casing kept every character in place (always true for ASCII)
+    if len(upper) != len(line):
+        return tuple(result.items()), None, flags
+    
+    return tuple(result.items()), tuple(rapid_edits), flags
+
+class ParsedLine(dict):
+    """Result of GCodeSimulator.parse_line.
+    
+    A regular word letter -> value dict that also carries the rapid edits
+    (None when unavailable) and the _WORD_BITS flags of the words present.
+    """
+    __slots__ = ('rapid_edits', 'flags')
+    
+    def __init__(self, items, rapid_edits: Optional[tuple], flags: int):
+        super().__init__(items)
+        self.rapid_edits = rapid_edits
+        self.flags = flags
+
+# Lines handed to a worker process per task when parsing with jobs > 1
+_PARSE_CHUNK_LINES = 10000
+
+def _parse_chunk(lines: List[str]) -> List[tuple]:
+    """Worker-process entry point: parse a chunk of stripped lines."""
+    return [_parse_words(line) for line in lines]
+
+def _zip_parsed(lines: List[str], stripped_lines: List[str],
+                parsed_chunk: Future) -> Iterator[Tuple[str, str, ParsedLine]]:
+    """Pair a chunk of raw and stripped lines with its worker-parsed words."""
+    for line, stripped, words in zip(lines, stripped_lines, parsed_chunk.result()):
+        yield line, stripped, ParsedLine(*words)
+
+def _apply_rapid_edits(text: str, offset: int, rapid_edits: tuple) -> str:
+    """Splice G1 -> G0 and F-word removals into text (edits shifted by offset)."""
+    pieces = []
+    pos = 0
+    for start, end, replacement in rapid_edits:
+        start += offset
+        if not replacement:
+            # Dropped F word takes the whitespace in front of it along
+            while start > pos and text[start - 1].isspace():
+                start -= 1
+        pieces.append(text[pos:start])
+        pieces.append(replacement)
+        pos = end + offset
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+# Regex fallback for convert_line when no rapid edits are available
+_HAS_G_RE = re.compile(r'\b[Gg]0*\d+')
+_G1_WORD_RE = re.compile(r'\b[Gg]0*1\b')
+_F_WORD_RE = re.compile(r'\s*[Ff][-+]?\d*\.?\d+')
+
+# Placeholder stored in MoveHistory for moves without a feed rate
+_NO_FEED = float('nan')
+
+# Output file buffer size; lines are streamed out rather than collected
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Modal motion commands (G0 rapid, G1 linear feed, G2/G3 arcs)
+_MOTION_G = frozenset((0, 1, 2, 3))
+
+# Non-motion modal G codes -> (MachineState attribute, value)
+_MODAL_G = {
+    90: ('absolute_mode', True),
+    91: ('absolute_mode', False),
+    21: ('units_mm', True),
+    20: ('units_mm', False),
+    17: ('plane', 'XY'),
+    18: ('plane', 'XZ'),
+    19: ('plane', 'YZ'),
+}
+
+# Work coordinate system selection (G54-G59)
+_WORK_COORDINATES = frozenset((54, 55, 56, 57, 58, 59))
+
+# dataclass(slots=True) drops the per-instance __dict__ but needs Python 3.10+
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class MachineState:
     """Tracks the complete state of the CNC machine."""
     x: float = 0.0
@@ -41,162 +229,174 @@ class MachineState:
             total_time_seconds=self.total_time_seconds
         )
 
+class MoveHistory(Sequence):
+    """Record of executed moves, stored column-wise in typed arrays.
+    
+    Each move costs a handful of packed doubles instead of a dict of tuples.
+    Indexing or iterating rebuilds the original move_info dicts on demand.
+    """
+    
+    def __init__(self):
+        self._from = array('d')  # x, y, z triples
+        self._to = array('d')  # x, y, z triples
+        self._feed_rate = array('d')  # NaN when the move has no feed rate
+        self._distance = array('d')
+        self._time_s = array('d')
+        self._rapid = array('B')  # 1 = rapid, 0 = feed
+    
+    def append_move(self, is_rapid: bool, from_xyz: Tuple[float, float, float],
+                    to_xyz: Tuple[float, float, float], feed_rate: Optional[float],
+                    distance: float, time_s: float):
+        """Record a single move."""
+        self._from.extend(from_xyz)
+        self._to.extend(to_xyz)
+        self._feed_rate.append(_NO_FEED if feed_rate is None else feed_rate)
+        self._distance.append(distance)
+        self._time_s.append(time_s)
+        self._rapid.append(is_rapid)
+    
+    def __len__(self) -> int:
+        return len(self._rapid)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('move index out of range')
+        
+        i = index * 3
+        feed_rate = self._feed_rate[index]
+        return {
+            'type': 'rapid' if self._rapid[index] else 'feed',
+            'from': tuple(self._from[i:i + 3]),
+            'to': tuple(self._to[i:i + 3]),
+            'feed_rate': None if feed_rate != feed_rate else feed_rate,  # NaN -> None
+            'distance': self._distance[index],
+            'time_s': self._time_s[index]
+        }
+
 class GCodeSimulator:
     """Simulates G-code execution to track machine state."""
     
     # Set default rapid rate (5000 mm/min)
-    def __init__(self, rapid_rate: float = 5000.0): 
+    def __init__(self, rapid_rate: float = 5000.0, enable_history: bool = False): 
         self.state = MachineState()
-        self.move_history = []
+        self.move_history = MoveHistory()  # Stays empty unless enable_history is set
         self.rapid_traverse_rate = rapid_rate # Used for G0 time estimation
+        self._enable_history = enable_history # Debug: record every move
         
-    def parse_line(self, line: str) -> dict:
+    def parse_line(self, line: str, already_stripped: bool = False) -> ParsedLine:
         """Parse a G-code line into components."""
-        line = line.strip()
-        
-        # Remove comments
-        line = re.sub(r'\(.*?\)', '', line)
-        line = re.sub(r';.*$', '', line)
-        line = line.strip()
-        
-        if not line:
-            return {'type': 'empty'}
-        
-        result = {'type': 'command', 'original': line}
-        
-        # Extract G command
-        g_match = re.search(r'G0*(\d+)', line, re.IGNORECASE)
-        if g_match:
-            result['G'] = int(g_match.group(1))
-        
-        # Extract M command
-        m_match = re.search(r'M(\d+)', line, re.IGNORECASE)
-        if m_match:
-            result['M'] = int(m_match.group(1))
-        
-        # Extract coordinates
-        for axis in ['X', 'Y', 'Z', 'I', 'J', 'K', 'R']:
-            match = re.search(rf'{axis}([-+]?\d*\.?\d+)', line, re.IGNORECASE)
-            if match:
-                result[axis] = float(match.group(1))
-        
-        # Extract feed rate
-        f_match = re.search(r'F([-+]?\d*\.?\d+)', line, re.IGNORECASE)
-        if f_match:
-            result['F'] = float(f_match.group(1))
-        
-        # Extract spindle speed
-        s_match = re.search(r'S(\d+)', line, re.IGNORECASE)
-        if s_match:
-            result['S'] = int(s_match.group(1))
-        
-        return result
+        if not already_stripped:
+            line = line.strip()
+        return ParsedLine(*_parse_words(line))
     
-    def execute_line(self, line: str) -> Tuple[MachineState, Optional[dict]]:
-        """Execute a line and return new state and move info."""
-        parsed = self.parse_line(line)
-        
-        if 'G' in parsed and parsed['G'] == 10 and 'Z' in parsed:
+    def execute_line(self, line: str, *, parsed: Optional[dict] = None) -> Tuple[MachineState, Optional[dict]]:
+        """Execute a line and return new state and move info.
+        
+        Pass ``parsed`` (the result of parse_line for this line) to skip re-parsing.
+        """
+        if parsed is None:
+            parsed = self.parse_line(line)
+        flags = getattr(parsed, 'flags', None)
+        if flags is None:
+            flags = _word_flags(parsed)
+        
+        # Each modal update below only runs for words the line actually carries
+        if flags & _B_G and parsed['G'] == 10 and flags & _B_Z:
             self.state.z = parsed['Z']  # Set current Z to probe zero
             return self.state, None
         
-        old_state = self.state.copy()
-        
         # Update modal settings
-        if 'G' in parsed:
+        if flags & _B_G:
             g = parsed['G']
-            if g in [0, 1, 2, 3]:  # Motion commands
+            if g in _MOTION_G:  # Motion commands
                 self.state.current_g = g
-            elif g == 90:
-                self.state.absolute_mode = True
-            elif g == 91:
-                self.state.absolute_mode = False
-            elif g == 21:
-                self.state.units_mm = True
-            elif g == 20:
-                self.state.units_mm = False
-            elif g == 17:
-                self.state.plane = 'XY'
-            elif g == 18:
-                self.state.plane = 'XZ'
-            elif g == 19:
-                self.state.plane = 'YZ'
-            elif g in [54, 55, 56, 57, 58, 59]:
-                self.state.work_coordinate = f'G{g}'
+            else:
+                modal = _MODAL_G.get(g)
+                if modal is not None:
+                    setattr(self.state, *modal)
+                elif g in _WORK_COORDINATES:
+                    self.state.work_coordinate = f'G{g}'
         
         # Update feed rate
-        if 'F' in parsed:
+        if flags & _B_F:
             self.state.feed_rate = parsed['F']
         
         # Update spindle speed
-        if 'S' in parsed:
+        if flags & _B_S:
             self.state.spindle_speed = parsed['S']
         
-        # Execute motion
+        # Execute motion (only X/Y/Z words can change the position)
         move_info = None
-        if self.state.current_g in [0, 1, 2, 3]:
+        state = self.state
+        if flags & _XYZ_BITS and state.current_g in _MOTION_G:
             # Calculate new position
-            new_x = self.state.x
-            new_y = self.state.y
-            new_z = self.state.z
+            old_x, old_y, old_z = state.x, state.y, state.z
+            new_x, new_y, new_z = old_x, old_y, old_z
+            absolute = state.absolute_mode
             
             if 'X' in parsed:
-                new_x = parsed['X'] if self.state.absolute_mode else self.state.x + parsed['X']
+                new_x = parsed['X'] if absolute else old_x + parsed['X']
             if 'Y' in parsed:
-                new_y = parsed['Y'] if self.state.absolute_mode else self.state.y + parsed['Y']
+                new_y = parsed['Y'] if absolute else old_y + parsed['Y']
             if 'Z' in parsed:
-                new_z = parsed['Z'] if self.state.absolute_mode else self.state.z + parsed['Z']
+                new_z = parsed['Z'] if absolute else old_z + parsed['Z']
             
             # Check if this is actually a move
-            if new_x != self.state.x or new_y != self.state.y or new_z != self.state.z:
+            if new_x != old_x or new_y != old_y or new_z != old_z:
                 
                 # Calculate 3D Distance (Distance Formula)
-                dx = new_x - self.state.x
-                dy = new_y - self.state.y
-                dz = new_z - self.state.z
-                distance = (dx**2 + dy**2 + dz**2)**0.5
+                dx = new_x - old_x
+                dy = new_y - old_y
+                dz = new_z - old_z
+                distance = sqrt(dx * dx + dy * dy + dz * dz)
                 
                 # Determine Rate and Calculate Time
-                rate_per_minute = 0.0
-                
-                if self.state.current_g == 0:
+                is_rapid = state.current_g == 0
+                if is_rapid:
                     # Rapid move uses the fixed rapid rate
                     rate_per_minute = self.rapid_traverse_rate
-                elif self.state.current_g in [1, 2, 3]:
-                    # Feed move uses the F rate, or defaults if missing
+                else:
+                    # Feed move (G1/G2/G3) uses the F rate, or defaults if missing
                     # Use a sensible default (e.g., 1.0 mm/min) to avoid division by zero if F is unset
-                    rate_per_minute = self.state.feed_rate if self.state.feed_rate is not None else 1.0 
+                    rate_per_minute = state.feed_rate if state.feed_rate is not None else 1.0
                 
-                time_in_minutes = distance / rate_per_minute if rate_per_minute > 0 else 0.0
-                time_in_seconds = time_in_minutes * 60.0
+                time_in_seconds = distance / rate_per_minute * 60.0 if rate_per_minute > 0 else 0.0
                 
                 # Update Machine State
-                self.state.total_time_seconds += time_in_seconds
+                state.total_time_seconds += time_in_seconds
                 
                 move_info = {
-                    'type': 'rapid' if self.state.current_g == 0 else 'feed',
-                    'from': (self.state.x, self.state.y, self.state.z),
+                    'type': 'rapid' if is_rapid else 'feed',
+                    'from': (old_x, old_y, old_z),
                     'to': (new_x, new_y, new_z),
-                    'feed_rate': self.state.feed_rate if self.state.current_g != 0 else None,
+                    'feed_rate': None if is_rapid else state.feed_rate,
                     'distance': distance,
                     'time_s': time_in_seconds
                 }
                 
-                self.state.x = new_x
-                self.state.y = new_y
-                self.state.z = new_z
+                state.x = new_x
+                state.y = new_y
+                state.z = new_z
                 
-                self.move_history.append(move_info)
+                if self._enable_history:
+                    self.move_history.append_move(is_rapid, move_info['from'], move_info['to'],
+                                                  move_info['feed_rate'], distance, time_in_seconds)
         
         return self.state, move_info
 
 class GCodeConverter:
     """Converts G1 travel moves to G0 rapids."""
     
-    def __init__(self, z_safe: float = 17.0, conservative: bool = True, rapid_rate: float = 5000.0):
+    def __init__(self, z_safe: float = 17.0, conservative: bool = True, rapid_rate: float = 5000.0,
+                 enable_history: bool = False, jobs: int = 1):
         self.z_safe = z_safe
         self.conservative = conservative
-        self.simulator = GCodeSimulator(rapid_rate=rapid_rate)
+        self.jobs = jobs  # Worker processes used to parse lines (1 = parse in-process)
+        self.simulator = GCodeSimulator(rapid_rate=rapid_rate, enable_history=enable_history)
         
     def should_convert_to_rapid(self, parsed: dict, state: MachineState) -> bool:
         """Convert G1 to G0 only if fully above safe Z."""
@@ -204,89 +404,153 @@ class GCodeConverter:
         if current_g != 1:
             return False
 
+        flags = getattr(parsed, 'flags', None)
+        if flags is None:
+            flags = _word_flags(parsed)
+
         # No coordinates? Not a move
-        if not any(k in parsed for k in ['X', 'Y', 'Z']):
+        if not flags & _XYZ_BITS:
             return False
 
         # Determine target Z
-        target_z = state.z
-        if 'Z' in parsed:
-            target_z = parsed['Z'] if state.absolute_mode else state.z + parsed['Z']
-
-        # Check both current Z and target Z
-        if state.z >= self.z_safe and target_z >= self.z_safe:
-            # XY moves only if already at safe Z
-            if self.conservative and 'Z' not in parsed:
-                return True
-            # Z moves upward only
-            if 'Z' in parsed and target_z >= state.z:
-                return True
-            # Aggressive mode converts any safe-Z move
-            if not self.conservative:
-                return True
-
-        return False  # Below safe Z
-        
-    def convert_line(self, line: str, state: MachineState) -> Tuple[str, bool]:
-        """Convert a single line if appropriate. Returns (new_line, was_converted)."""
-        stripped = line.strip()
-        parsed = self.simulator.parse_line(stripped)
+        current_z = state.z
+        target_z = current_z
+        if flags & _B_Z:
+            target_z = parsed['Z'] if state.absolute_mode else current_z + parsed['Z']
+
+        # Both current Z and target Z must be at or above safe Z. Conservative
+        # mode additionally refuses downward moves (XY-only moves keep Z, so
+        # they always pass); aggressive mode converts any safe-Z move.
+        z_safe = self.z_safe
+        return (current_z >= z_safe and target_z >= z_safe
+                and (not self.conservative or target_z >= current_z))
+        
+    def convert_line(self, line: str, state: MachineState, parsed: Optional[dict] = None,
+                     stripped: Optional[str] = None) -> Tuple[str, bool, dict]:
+        """Convert a single line if appropriate. Returns (new_line, was_converted, parsed)."""
+        if stripped is None:
+            stripped = line.strip()
+        if parsed is None:
+            parsed = self.simulator.parse_line(stripped, already_stripped=True)
         
         if parsed['type'] == 'empty':
-            return line, False
+            return line, False, parsed
         
         # Check if we should convert
         if not self.should_convert_to_rapid(parsed, state):
-            return line, False
+            return line, False, parsed
         
         # Need to convert this G1 move to G0
-        
-        # Check if line already has G command
-        has_g_command = re.search(r'\bG0*\d+', stripped, re.IGNORECASE)
-        
-        if has_g_command:
-            # Replace existing G1 with G0
-            new_line = re.sub(r'\bG0*1\b', 'G0', stripped, flags=re.IGNORECASE)
+        rapid_edits = getattr(parsed, 'rapid_edits', None)
+        
+        if rapid_edits is not None:
+            # Splice at the word positions found by the parser; comments are left untouched
+            if 'G' in parsed:
+                # Replace existing G1 with G0
+                new_line = _apply_rapid_edits(stripped, 0, rapid_edits)
+            else:
+                # No G command - this is modal G1, need to add G0
+                new_line = _apply_rapid_edits('G0 ' + stripped, 3, rapid_edits)
         else:
-            # No G command - this is modal G1, need to add G0
-            new_line = 'G0 ' + stripped
-        
-        # Remove feed rate from G0 moves (rapids don't use feed rates)
-        new_line = re.sub(r'\s*F[-+]?\d*\.?\d+', '', new_line, flags=re.IGNORECASE)
+            # Check if line already has G command
+            if _HAS_G_RE.search(stripped):
+                # Replace existing G1 with G0
+                new_line = _G1_WORD_RE.sub('G0', stripped)
+            else:
+                # No G command - this is modal G1, need to add G0
+                new_line = 'G0 ' + stripped
+            
+            # Remove feed rate from G0 moves (rapids don't use feed rates)
+            new_line = _F_WORD_RE.sub('', new_line)
         
         # Preserve original line ending style
         if line.endswith('\n'):
             new_line += '\n'
         
-        return new_line, True
+        return new_line, True, parsed
     
     def convert_file(self, input_file: str, output_file: str, dry_run: bool = False) -> dict:
         """Convert G-code file, optionally in dry-run mode."""
-        with open(input_file, 'r') as f:
-            lines = f.readlines()
+        result = {'total_lines': 0, 'conversions': []}
         
-        output_lines = []
-        conversions = []
+        with open(input_file, 'r') as f:
+            # Stream lines straight from the file; it is only read up front when
+            # the output would overwrite the input while it is still being read
+            lines = f
+            if not dry_run and os.path.exists(output_file) and os.path.samefile(input_file, output_file):
+                lines = f.readlines()
+            
+            parsed_lines = self._parse_lines(lines)
+            output_lines = self._convert_lines(parsed_lines, result)
+            
+            # Stream output through a large write buffer if not dry run
+            if dry_run:
+                for _ in output_lines:
+                    pass
+            else:
+                with open(output_file, 'w', buffering=_WRITE_BUFFER_SIZE) as out:
+                    out.writelines(output_lines)
+        
+        result['move_history'] = self.simulator.move_history
+        return result
+    
+    def _parse_lines(self, lines: Iterable[str]) -> Iterator[Tuple[str, str, ParsedLine]]:
+        """Yield (line, stripped line, parsed) triples for the conversion loop.
+        
+        Parsing only depends on the line text, so with jobs > 1 it runs ahead
+        in worker processes, a bounded number of chunks at a time, while the
+        modal conversion and simulation stay sequential in this process.
+        """
+        if self.jobs <= 1:
+            # Parse lazily, one line ahead of the conversion loop
+            parse_line = self.simulator.parse_line
+            for line in lines:
+                stripped = line.strip()
+                yield line, stripped, parse_line(stripped, already_stripped=True)
+            return
+        
+        lines = iter(lines)
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            for chunk in iter(lambda: list(islice(lines, _PARSE_CHUNK_LINES)), []):
+                stripped_chunk = [line.strip() for line in chunk]
+                pending.append((chunk, stripped_chunk, pool.submit(_parse_chunk, stripped_chunk)))
+                if len(pending) > 2 * self.jobs:
+                    yield from _zip_parsed(*pending.popleft())
+            while pending:
+                yield from _zip_parsed(*pending.popleft())
+    
+    def _convert_lines(self, parsed_lines: Iterable[Tuple[str, str, dict]], result: dict):
+        """Yield output lines one at a time, filling in result's line count and conversions."""
+        # Bind hot-loop lookups to locals once instead of resolving them per line
+        convert_line = self.convert_line
+        parse_line = self.simulator.parse_line
+        execute_line = self.simulator.execute_line
+        state = self.simulator.state  # mutated in place by execute_line
+        log_conversion = result['conversions'].append
         
         # Track if the PREVIOUS line was converted from G1 to G0
         was_prev_line_converted = False 
         
-        for line_num, line in enumerate(lines, 1):
-            stripped_line = line.strip()
-            
+        line_num = 0
+        for line_num, (line, stripped_line, parsed) in enumerate(parsed_lines, 1):
             # 1. Try to convert BEFORE executing (using the state *before* the move)
-            new_line, converted = self.convert_line(line, self.simulator.state)
+            new_line, converted, parsed = convert_line(line, state, parsed, stripped_line)
             line_for_execution = new_line if converted else line
+            parsed_for_execution = parsed
+            
+            if converted:
+                # Only a converted line's text differs from what was already parsed
+                converted_line = new_line.strip()
+                parsed_for_execution = parse_line(converted_line, already_stripped=True)
             
             # --- CRITICAL FIX: Explicit G1 Injection for Output and Execution ---
             # If the line was *not* converted:
             if not converted:
-                parsed = self.simulator.parse_line(stripped_line)
-                
                 # Check for: Modal motion command (has coords)
-                is_motion = any(k in parsed for k in ['X', 'Y', 'Z', 'I', 'J', 'K'])
+                is_motion = parsed.flags & _MOTION_BITS
                 # Check if it lacks an explicit G command
-                has_no_g_code = 'G' not in parsed
+                has_no_g_code = not parsed.flags & _B_G
                 
                 # If the previous line was converted (set modal G0) AND this is a modal motion, 
                 # we must inject G1 to resume feed rate, both for the output and the simulator.
@@ -297,37 +561,32 @@ class GCodeConverter:
                     if line.endswith('\n'):
                         new_line += '\n'
                         
-                    # Also use G1 injected line for simulator execution
+                    # Also use G1 injected line for simulator execution; the
+                    # injected G word is its only difference from the parsed line
                     line_for_execution = new_line
-            
-            # Append the (potentially G1-injected or G0-converted) line to output
-            output_lines.append(new_line)
+                    parsed_for_execution = ParsedLine(parsed, None, parsed.flags | _B_G)
+                    parsed_for_execution['G'] = 1
+                    parsed_for_execution['original'] = 'G1 ' + parsed['original']
             
             # 2. Log conversion if it happened (G1 -> G0)
             if converted:
-                conversions.append({
+                log_conversion({
                     'line_num': line_num,
                     'original': stripped_line,
-                    'converted': new_line.strip(),
-                    'z_position': self.simulator.state.z
+                    'converted': converted_line,
+                    'z_position': state.z
                 })
             
             # 3. Execute in simulator to track state for next line
-            self.simulator.execute_line(line_for_execution)
+            execute_line(line_for_execution, parsed=parsed_for_execution)
             
             # 4. Update state tracker for next loop iteration
             was_prev_line_converted = converted
             
-        # Write output if not dry run
-        if not dry_run:
-            with open(output_file, 'w') as f:
-                f.writelines(output_lines)
+            # Emit the (potentially G1-injected or G0-converted) line
+            yield new_line
         
-        return {
-            'total_lines': len(lines),
-            'conversions': conversions,
-            'move_history': self.simulator.move_history
-        }
+        result['total_lines'] = line_num
 
 def main():
     if len(sys.argv) < 2:
@@ -339,6 +598,7 @@ def main():
         print("  --aggressive         Convert all moves at safe height")
         print("  --rapid-rate=<rate>  Rapid speed for G0 time estimate (default: 5000.0 mm/min)")
         print("  --dry-run            Preview changes without modifying file")
+        print("  --jobs=<n>           Worker processes for parsing large files (default: 1)")
         print("\nExamples:")
         print("  python script.py input.nc --dry-run")
         print("  python script.py input.nc output.nc --z-safe=16.5 --rapid-rate=8000")
@@ -351,6 +611,7 @@ def main():
     conservative = True
     rapid_rate = 5000.0 # Default set to 5000 mm/min
     dry_run = False
+    jobs = 1
     
     for arg in sys.argv[2:]:
         if arg.startswith('--z-safe='):
@@ -361,6 +622,8 @@ def main():
             rapid_rate = float(arg.split('=')[1])
         elif arg == '--dry-run':
             dry_run = True
+        elif arg.startswith('--jobs='):
+            jobs = int(arg.split('=')[1])
         elif not arg.startswith('--'):
             output_file = arg
     
@@ -380,7 +643,7 @@ def main():
     print(f"Rapid Rate: {rapid_rate} mm/min (for time estimate)")
     print()
     
-    converter = GCodeConverter(z_safe=z_safe, conservative=conservative, rapid_rate=rapid_rate)
+    converter = GCodeConverter(z_safe=z_safe, conservative=conservative, rapid_rate=rapid_rate, jobs=jobs)
     result = converter.convert_file(input_file, output_file or 'dry_run.nc', dry_run=dry_run)
     
     # Display results